@@ -1,37 +1,231 @@
 import os
+import mmap
+import time
+import hashlib
 import argparse
+from concurrent.futures import ThreadPoolExecutor
 from zai import ZhipuAiClient
 
-# 初始化AI客户端
-client = ZhipuAiClient(api_key=os.getenv('ZHIPUAI_API_KEY'))
+def _build_client():
+    """创建AI客户端，尽量注入带连接池的HTTP客户端
+
+    分段并行摘要会对同一端点连续发起多次请求，复用keep-alive连接
+    可以省去每次请求约上百毫秒的TCP+TLS握手开销。
+    SDK不支持自定义HTTP客户端（或未安装httpx）时回退到默认构造方式。
+    """
+    api_key = os.getenv('ZHIPUAI_API_KEY')
+    try:
+        import httpx
+        http_client = httpx.Client(
+            limits=httpx.Limits(max_keepalive_connections=16, max_connections=16))
+        return ZhipuAiClient(api_key=api_key, http_client=http_client)
+    except (ImportError, TypeError):
+        return ZhipuAiClient(api_key=api_key)
+
+
+# 初始化AI客户端（模块级单例，所有请求共享同一个连接池）
+client = _build_client()
+
+MODEL = "glm-4.5-flash"
+SYSTEM_PROMPT = "你是一个网络设备巡检专家，能够分析设备巡检日志并识别潜在问题。"
+
+# 分析结果的本地缓存：相同的日志内容无需重复调用大模型
+CACHE_DIR = os.path.join(os.path.expanduser('~'), '.cache', 'pyinspect')
+CACHE_TTL = 24 * 3600  # 缓存有效期（秒）
+
+# 巡检报告中每台设备之间的分隔线（与network_inspector.save_results保持一致）
+SECTION_SEPARATOR = '=' * 50
+
+# 超过该长度的日志按设备分段并行摘要，避免单次请求超出上下文窗口
+CHUNK_THRESHOLD = 30000
+SUMMARY_WORKERS = 8
 
-def read_inspect_file(file_path):
-    """读取inspect.txt文件内容"""
-    with open(file_path, 'r', encoding='utf-8') as file:
-        return file.read()
 
+def _cache_path(user_content):
+    """根据模型、系统提示词和用户内容计算缓存文件路径"""
+    key = hashlib.sha256(
+        (MODEL + SYSTEM_PROMPT + user_content).encode('utf-8')).hexdigest()
+    return os.path.join(CACHE_DIR, f'{key}.txt')
+
+
+def _read_cache(cache_file):
+    """读取未过期的缓存结果，不存在或已过期时返回None"""
+    try:
+        if time.time() - os.path.getmtime(cache_file) > CACHE_TTL:
+            return None
+        with open(cache_file, 'r', encoding='utf-8') as f:
+            return f.read()
+    except OSError:
+        return None
+
+
+def _write_cache(cache_file, result):
+    """写入缓存结果，失败时不影响正常分析流程"""
+    try:
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        # 先写临时文件再原子替换，避免写入中途留下半截缓存
+        tmp_file = cache_file + '.tmp'
+        with open(tmp_file, 'w', encoding='utf-8') as f:
+            f.write(result)
+        os.replace(tmp_file, cache_file)
+    except OSError:
+        pass
+
+def read_inspect_file(file_path, chunk_size=1 << 20):
+    """分块读取inspect.txt文件内容
+
+    返回分块迭代器而不是完整字符串，由调用方在拼接提示词时一次性join。
+    这样避免了"file.read()一份 + f-string再拷贝一份"的双份内存占用，
+    对多MB的巡检报告可以把峰值内存减半。
+
+    使用1MiB的读缓冲区（默认仅8KiB），每次read()系统调用摊薄到更多字节，
+    读取大文件时能显著减少系统调用次数。
+    """
+    with open(file_path, 'r', encoding='utf-8', buffering=1 << 20) as file:
+        while True:
+            chunk = file.read(chunk_size)
+            if not chunk:
+                break
+            yield chunk
+
+
+def analyze_with_ai(content_parts, use_cache=True):
+    """使用AI大模型分析内容
+
+    Args:
+        content_parts: 巡检日志内容（字符串或字符串分块迭代器）
+        use_cache (bool): 是否使用本地缓存，相同内容直接返回上次的分析结果
+    """
+    if isinstance(content_parts, str):
+        content_parts = (content_parts,)
+
+    # 提示词前缀与各分块一次join，全程只构造一份完整的提示词字符串
+    user_content = ''.join([
+        "请分析以下网络设备巡检日志，识别任何潜在的问题或异常，并提供简要的总结报告"
+        "（1.设备的基本情况；2.每台设备存在的问题异常；3.总结）：\n\n",
+        *content_parts
+    ])
+
+    # 内容未变化时直接返回缓存的分析结果，省去一次大模型调用
+    cache_file = _cache_path(user_content)
+    if use_cache:
+        cached = _read_cache(cache_file)
+        if cached is not None:
+            print("日志内容未变化，使用缓存的分析结果")
+            return cached
 
-def analyze_with_ai(content):
-    """使用AI大模型分析内容"""
     try:
         response = client.chat.completions.create(
-            model="glm-4.5-flash",
+            model=MODEL,
             messages=[
                 {
                     "role": "system",
-                    "content": "你是一个网络设备巡检专家，能够分析设备巡检日志并识别潜在问题。"
+                    "content": SYSTEM_PROMPT
                 },
                 {
                     "role": "user",
-                    "content": f"请分析以下网络设备巡检日志，识别任何潜在的问题或异常，并提供简要的总结报告（1.设备的基本情况；2.每台设备存在的问题异常；3.总结）：\n\n{content}"
+                    "content": user_content
                 }
             ],
             temperature=0.0
         )
-        return response.choices[0].message.content
+        result = response.choices[0].message.content
     except Exception as e:
         return f"分析过程中出现错误: {str(e)}"
 
+    # 分析成功才写入缓存，出错信息不缓存
+    if use_cache:
+        _write_cache(cache_file, result)
+
+    return result
+
+
+def _split_sections(content):
+    """按save_results写入的分隔线把巡检日志切分为单台设备的段落"""
+    sections = [section.strip() for section in content.split(SECTION_SEPARATOR)]
+    return [section for section in sections if section]
+
+
+def _split_sections_mmap(file_path):
+    """用mmap在字节层面把巡检日志切分为单台设备的段落
+
+    把全文读进Python字符串再split会产生整个文件的多份拷贝；
+    mmap由内核按需换页，find()在C层扫描字节，只有切出的段落
+    才解码为字符串，峰值内存只与单个段落大小相关。
+    """
+    separator = SECTION_SEPARATOR.encode('utf-8')
+    sections = []
+
+    with open(file_path, 'rb') as f:
+        if os.path.getsize(file_path) == 0:
+            return sections
+
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            pos = 0
+            while True:
+                end = mm.find(separator, pos)
+                chunk = mm[pos:end] if end != -1 else mm[pos:]
+                section = chunk.decode('utf-8', errors='replace').strip()
+                if section:
+                    sections.append(section)
+                if end == -1:
+                    break
+                pos = end + len(separator)
+
+    return sections
+
+
+def _summarize_section(section):
+    """对单台设备的巡检段落做摘要"""
+    try:
+        response = client.chat.completions.create(
+            model=MODEL,
+            messages=[
+                {
+                    "role": "system",
+                    "content": SYSTEM_PROMPT
+                },
+                {
+                    "role": "user",
+                    "content": "请总结以下单台网络设备的巡检输出，"
+                               "指出存在的问题或异常（没有问题时请说明运行正常）：\n\n" + section
+                }
+            ],
+            temperature=0.0
+        )
+        return response.choices[0].message.content
+    except Exception as e:
+        return f"该设备段落分析失败: {str(e)}"
+
+
+def analyze_large_log(content, use_cache=True):
+    """分段并行分析大日志
+
+    长日志一次性发给模型既可能超出上下文窗口，也让整个分析串行等待
+    一次慢调用。按设备段落并行做摘要（API调用是I/O密集型，加速比
+    约等于并发段落数），再把各段摘要汇总交给analyze_with_ai生成最终报告。
+
+    Args:
+        content (str|list): 完整的巡检日志内容，或已切分好的段落列表
+        use_cache (bool): 是否对最终综合分析使用本地缓存
+    """
+    if isinstance(content, str):
+        sections = _split_sections(content)
+    else:
+        sections = content
+
+    # 只有一个段落时分段没有意义，走普通分析路径
+    if len(sections) <= 1:
+        return analyze_with_ai(sections, use_cache=use_cache)
+
+    print(f"日志较大，按{len(sections)}个设备段落并行摘要...")
+    with ThreadPoolExecutor(max_workers=min(SUMMARY_WORKERS, len(sections))) as executor:
+        summaries = list(executor.map(_summarize_section, sections))
+
+    merged = '\n\n'.join(
+        f"【段落{i}摘要】\n{summary}" for i, summary in enumerate(summaries, 1))
+    return analyze_with_ai(merged, use_cache=use_cache)
+
 
 def main():
     # 设置命令行参数解析
@@ -40,6 +234,8 @@ def main():
                         help='巡检日志文件路径 (默认: inspect.txt)')
     parser.add_argument('-o', '--output', default='analysis_report.txt',
                         help='分析报告输出文件路径 (默认: analysis_report.txt)')
+    parser.add_argument('--no-cache', action='store_true',
+                        help='不使用本地缓存，强制重新调用AI分析')
     
     # 解析命令行参数
     args = parser.parse_args()
@@ -49,19 +245,26 @@ def main():
         print(f"错误: 文件 {args.input} 不存在")
         return
 
-    content = read_inspect_file(args.input)
-
     # 调用AI分析
     print("正在分析巡检日志...")
-    analysis_result = analyze_with_ai(content)
+    if os.path.getsize(args.input) > CHUNK_THRESHOLD:
+        # 大日志用mmap按设备切段，并行摘要后再综合，全文不整体进内存
+        sections = _split_sections_mmap(args.input)
+        analysis_result = analyze_large_log(sections, use_cache=not args.no_cache)
+    else:
+        analysis_result = analyze_with_ai(read_inspect_file(args.input),
+                                          use_cache=not args.no_cache)
 
     # 输出结果
     print("\n=== AI分析结果 ===")
     print(analysis_result)
 
-    # 保存结果到文件
-    with open(args.output, "w", encoding="utf-8") as f:
+    # 保存结果到文件（1MiB写缓冲区，减少write系统调用次数；
+    # 先写临时文件再原子替换，避免覆盖上一份报告后写到一半崩溃）
+    tmp_file = args.output + '.tmp'
+    with open(tmp_file, "w", encoding="utf-8", buffering=1 << 20) as f:
         f.write(analysis_result)
+    os.replace(tmp_file, args.output)
     print(f"\n分析报告已保存到 {args.output}")
 
 
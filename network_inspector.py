@@ -9,9 +9,160 @@
 import json
 import argparse
 import os
+import re
+import queue
+import logging
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Optional
+from logging.handlers import QueueHandler, QueueListener
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from netmiko import ConnectHandler
 from netmiko import NetMikoTimeoutException, NetMikoAuthenticationException
 
+logger = logging.getLogger(__name__)
+
+
+def _setup_logging():
+    """
+    配置队列化的日志输出
+
+    并发巡检时每条print都要争抢stdout锁并刷新，成为工作线程之间的
+    串行点。改为工作线程只把日志记录放入内存队列（无I/O），由
+    QueueListener的后台线程统一输出。
+
+    Returns:
+        QueueListener: 已启动的监听器，调用方在结束时负责stop()
+    """
+    log_queue = queue.SimpleQueue()
+    handler = logging.StreamHandler()
+    handler.setFormatter(logging.Formatter('%(message)s'))
+
+    listener = QueueListener(log_queue, handler)
+    listener.start()
+
+    logger.addHandler(QueueHandler(log_queue))
+    logger.setLevel(logging.INFO)
+    return listener
+
+
+# orjson是C实现的JSON解析器，加载大规模设备清单时比标准库快数倍；
+# 未安装时回退到标准库json（两者解析失败时均抛出ValueError的子类）
+try:
+    import orjson
+    _json_loads = orjson.loads
+except ImportError:
+    _json_loads = json.loads
+
+# 提示符结尾的特权/模式符号和空白，预编译后供主机名提取复用
+_PROMPT_TAIL = re.compile(r'[#>$\s]+$')
+
+# conf配置中用双引号包围的命令，预编译避免逐行重新编译
+_QUOTED_CMD = re.compile(r'"([^"]*)"')
+
+# 各设备类型关闭回显分页的命令：分页开启时长输出会停在--More--提示上，
+# 每条命令都只能等read_timeout兜底超时才返回
+_PAGER_OFF = {
+    'cisco_ios': 'terminal length 0',
+    'cisco_xe': 'terminal length 0',
+    'cisco_nxos': 'terminal length 0',
+    'huawei': 'screen-length 0 temporary',
+    'h3c': 'screen-length disable',
+    'juniper': 'set cli screen-length 0'
+}
+
+# 各设备类型的默认巡检命令（模块级常量，避免每次巡检重建整个字典；
+# 使用元组保证不被调用方意外修改）
+_DEFAULT_COMMANDS = {
+    'cisco_ios': (
+        'show version',
+        'show ip interface brief',
+        'show vlan brief',
+        'show spanning-tree summary',
+        'show arp',
+        'show processes cpu',
+        'show memory statistics'
+    ),
+    'cisco_xe': (
+        'show version',
+        'show ip interface brief',
+        'show vlan brief',
+        'show spanning-tree summary',
+        'show arp',
+        'show processes cpu',
+        'show memory statistics'
+    ),
+    'cisco_nxos': (
+        'show version',
+        'show interface brief',
+        'show vlan brief',
+        'show spanning-tree detail',
+        'show ip arp',
+        'show processes cpu',
+        'show processes memory'
+    ),
+    'huawei': (
+        'display version',
+        'display ip interface brief',
+        'display vlan',
+        'display stp brief',
+        'display arp',
+        'display cpu-usage',
+        'display memory-usage'
+    ),
+    'h3c': (
+        'display version',
+        'display ip interface brief',
+        'display vlan',
+        'display stp brief',
+        'display arp',
+        'display cpu-usage',
+        'display memory'
+    ),
+    'juniper': (
+        'show version',
+        'show interfaces terse',
+        'show vlans',
+        'show spanning-tree bridge',
+        'show arp',
+        'show chassis alarms',
+        'show system processes summary'
+    )
+}
+
+
+@lru_cache(maxsize=None)
+def _default_commands(device_type):
+    """
+    按设备类型缓存默认巡检命令
+
+    同一设备类型在大规模清单中会出现很多次，缓存后每种类型只查一次表。
+
+    Args:
+        device_type (str): 设备类型
+
+    Returns:
+        tuple: 命令元组
+    """
+    return _DEFAULT_COMMANDS.get(device_type, ('show version',))
+
+
+@dataclass(slots=True)
+class InspectResult:
+    """
+    单台设备的巡检结果
+
+    使用slots数据类代替字典：hostname和ip_address不再重复占用键名，
+    每条结果的内存占用约为字典的一半，属性访问也更快，
+    对大规模设备清单的批量报告生成更友好。
+    """
+    hostname: Optional[str]
+    ip_address: Optional[str]
+    device_type: Optional[str]
+    status: str = 'failed'
+    output: str = ''
+    password_used: Optional[str] = None  # 记录使用的密码
+
 
 class NetworkInspector:
     def __init__(self, devices_file='devices.json', commands_file=None, config_file=None):
@@ -28,7 +179,7 @@ class NetworkInspector:
         self.config_file = config_file
         self.commands = self._load_commands() if commands_file else {}
         self.devices = self._load_devices()
-    
+
     def _load_conf_devices(self, conf_file=None):
         """
         从conf配置文件加载设备信息
@@ -55,7 +206,7 @@ class NetworkInspector:
                 # 分割字段
                 parts = line.split()
                 if len(parts) < 6:  # 至少需要6个字段
-                    print(f"警告: 第{line_num}行格式不正确，跳过该行: {line}")
+                    logger.warning(f"警告: 第{line_num}行格式不正确，跳过该行: {line}")
                     continue
                 
                 # 解析基本字段
@@ -71,8 +222,7 @@ class NetworkInspector:
                     # 处理用双引号包围的命令
                     command_line = ' '.join(parts[5:])
                     # 简单解析用双引号包围的命令
-                    import re
-                    commands = re.findall(r'"([^"]*)"', command_line)
+                    commands = _QUOTED_CMD.findall(command_line)
                     if not commands:
                         # 如果没有找到用双引号包围的命令，则按空格分割
                         commands = parts[5:]
@@ -94,10 +244,10 @@ class NetworkInspector:
                 devices.append(device)
                 
         except FileNotFoundError:
-            print(f"配置文件 {conf_path} 未找到，请检查文件路径。")
+            logger.warning(f"配置文件 {conf_path} 未找到，请检查文件路径。")
             return []
         except Exception as e:
-            print(f"解析配置文件 {conf_path} 时发生错误: {str(e)}")
+            logger.warning(f"解析配置文件 {conf_path} 时发生错误: {str(e)}")
             return []
             
         return devices
@@ -110,13 +260,13 @@ class NetworkInspector:
             dict: 巡检命令字典，以设备类型为键，命令列表为值
         """
         try:
-            with open(self.commands_file, 'r', encoding='utf-8') as f:
-                return json.load(f)
+            with open(self.commands_file, 'rb') as f:
+                return _json_loads(f.read())
         except FileNotFoundError:
-            print(f"命令文件 {self.commands_file} 未找到，请检查文件路径。")
+            logger.warning(f"命令文件 {self.commands_file} 未找到，请检查文件路径。")
             return {}
-        except json.JSONDecodeError:
-            print(f"命令文件 {self.commands_file} 格式错误，请检查JSON格式。")
+        except ValueError:
+            logger.warning(f"命令文件 {self.commands_file} 格式错误，请检查JSON格式。")
             return {}
     
     def _load_devices(self):
@@ -128,37 +278,68 @@ class NetworkInspector:
         """
         # 如果指定了config.conf文件
         if self.config_file and os.path.exists(self.config_file):
-            return self._load_conf_devices()
-        
+            return self._prepare_devices(self._load_conf_devices())
+
         # 如果devices_file实际上是config.conf文件
         if self.devices_file and self.devices_file.endswith('.conf') and os.path.exists(self.devices_file):
-            return self._load_conf_devices(self.devices_file)
-        
+            return self._prepare_devices(self._load_conf_devices(self.devices_file))
+
         # 处理JSON格式文件
         try:
-            with open(self.devices_file, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-                
-                # 如果是混合JSON格式（包含devices和commands键）
-                if isinstance(data, dict) and 'devices' in data:
-                    # 加载设备信息
-                    devices = data['devices']
-                    
-                    # 如果有commands键且未单独指定commands_file，则加载命令
-                    if 'commands' in data and not self.commands_file:
-                        self.commands = data['commands']
-                        
-                    return devices
-                else:
-                    # 传统格式，直接返回数据
-                    return data
+            with open(self.devices_file, 'rb') as f:
+                data = _json_loads(f.read())
+
+            # 如果是混合JSON格式（包含devices和commands键）
+            if isinstance(data, dict) and 'devices' in data:
+                # 加载设备信息
+                devices = data['devices']
+
+                # 如果有commands键且未单独指定commands_file，则加载命令
+                if 'commands' in data and not self.commands_file:
+                    self.commands = data['commands']
+
+                return self._prepare_devices(devices)
+            else:
+                # 传统格式，直接返回数据
+                return self._prepare_devices(data)
         except FileNotFoundError:
-            print(f"设备文件 {self.devices_file} 未找到，请创建该文件。")
+            logger.warning(f"设备文件 {self.devices_file} 未找到，请创建该文件。")
             return []
-        except json.JSONDecodeError:
-            print(f"设备文件 {self.devices_file} 格式错误，请检查JSON格式。")
+        except ValueError:
+            logger.warning(f"设备文件 {self.devices_file} 格式错误，请检查JSON格式。")
             return []
     
+    def _prepare_devices(self, devices):
+        """
+        预处理设备列表：提前算好Netmiko连接参数和密码尝试列表
+
+        把过滤backup_password/commands字段和构造密码列表的工作从巡检
+        热路径挪到加载阶段，每台设备只做一次。
+
+        Args:
+            devices (list): 设备信息列表
+
+        Returns:
+            list: 原地补充了_netmiko_kwargs和_passwords_labeled字段的设备列表
+        """
+        for device in devices:
+            if not isinstance(device, dict):
+                continue
+
+            device['_netmiko_kwargs'] = {
+                k: v for k, v in device.items()
+                if k not in ('backup_password', 'commands',
+                             '_netmiko_kwargs', '_passwords_labeled')
+            }
+
+            # (密码, 标签)对预先配好，重试循环内不再判断主/备用
+            passwords = [(device.get('password'), '主密码')]
+            if device.get('backup_password'):
+                passwords.append((device['backup_password'], '备用密码'))
+            device['_passwords_labeled'] = passwords
+
+        return devices
+
     def inspect_device(self, device):
         """
         对单个设备执行巡检
@@ -169,95 +350,97 @@ class NetworkInspector:
         Returns:
             dict: 巡检结果
         """
-        result = {
-            'hostname': device.get('host'),
-            'ip_address': device.get('host'),  # 添加IP地址
-            'device_type': device.get('device_type'),
-            'status': 'failed',
-            'output': '',
-            'password_used': None  # 记录使用的密码
-        }
-        
-        # 尝试使用主密码连接
-        device_config = device.copy()
-        passwords = [device.get('password')]
-        
-        # 如果配置了备用密码，也加入尝试列表
-        if 'backup_password' in device and device['backup_password']:
-            passwords.append(device['backup_password'])
+        result = InspectResult(
+            hostname=device.get('host'),
+            ip_address=device.get('host'),
+            device_type=device.get('device_type')
+        )
         
-        # 从设备配置中移除backup_password和commands，避免传递给Netmiko
-        device_config.pop('backup_password', None)
-        device_config.pop('commands', None)
+        # 连接参数和密码尝试列表在加载阶段已由_prepare_devices预先算好；
+        # 直接传入未经预处理的设备字典时现场补算一次
+        device_config = device.get('_netmiko_kwargs')
+        passwords = device.get('_passwords_labeled')
+        if device_config is None or passwords is None:
+            device_config = {k: v for k, v in device.items()
+                             if k not in ('backup_password', 'commands')}
+            passwords = [(device.get('password'), '主密码')]
+            if device.get('backup_password'):
+                passwords.append((device['backup_password'], '备用密码'))
         
         connection = None
         password_used = None  # 记录实际使用的密码
         
-        for i, password in enumerate(passwords):
+        for password, password_type in passwords:
             try:
                 # 更新设备配置中的密码
                 device_config['password'] = password
-                password_type = "主密码" if i == 0 else "备用密码"
-                print(f"正在尝试使用{password_type}连接设备 {device.get('host')}...")
+                logger.info(f"正在尝试使用{password_type}连接设备 {device.get('host')}...")
                 
                 # 建立连接
                 connection = ConnectHandler(**device_config)
                 password_used = password_type
                 
                 # 如果连接成功，跳出循环
-                print(f"成功使用{password_type}连接到设备 {device.get('host')}")
+                logger.info(f"成功使用{password_type}连接到设备 {device.get('host')}")
                 break
                 
             except NetMikoAuthenticationException:
-                print(f"使用{password_type}连接设备 {device.get('host')} 失败，尝试下一个密码...")
+                logger.info(f"使用{password_type}连接设备 {device.get('host')} 失败，尝试下一个密码...")
                 continue
             except NetMikoTimeoutException:
-                result['output'] = '连接超时'
-                result['password_used'] = password_used
+                result.output = '连接超时'
+                result.password_used = password_used
                 return result
             except Exception as e:
-                result['output'] = f'发生错误: {str(e)}'
-                result['password_used'] = password_used
+                result.output = f'发生错误: {str(e)}'
+                result.password_used = password_used
                 return result
         
         # 如果所有密码都尝试失败
         if connection is None:
-            result['output'] = '认证失败：所有密码尝试均失败'
-            result['password_used'] = password_used
+            result.output = '认证失败：所有密码尝试均失败'
+            result.password_used = password_used
             return result
         
         try:
             # 获取设备提示符以确定主机名
             prompt = connection.find_prompt()
-            hostname = prompt.rstrip('#>$ ')
-            result['hostname'] = hostname
-            result['password_used'] = password_used
+            hostname = _PROMPT_TAIL.sub('', prompt)
+            result.hostname = hostname
+            result.password_used = password_used
             
+            # 先按设备类型关闭分页，后续命令按行速率输出而不是等分页超时
+            pager_off = _PAGER_OFF.get(device.get('device_type'))
+            if pager_off:
+                try:
+                    connection.send_command_timing(pager_off)
+                except Exception:
+                    # 关闭分页失败不影响巡检，继续执行命令
+                    pass
+
             # 执行巡检命令（从设备配置或默认命令中获取）
             commands = self._get_inspection_commands(device)
-            output = ''
-            
-            for cmd in commands:
-                output += f'\n--- Command: {cmd} ---\n'
-                # 使用send_command_timing作为更可靠的方法
-                try:
-                    cmd_output = connection.send_command_timing(
-                        cmd,
-                        read_timeout=30,       # 设置30秒超时
-                        strip_prompt=False,    # 保留提示符
-                        strip_command=True     # 移除命令本身
-                    )
-                    output += cmd_output or ''
-                except Exception as e:
-                    # 记录错误但继续执行下一个命令
-                    output += f"命令 '{cmd}' 执行失败: {str(e)}\n"
-                
-            result['status'] = 'success'
-            result['output'] = output
+
+            # 优先批量下发命令，失败时回退为逐条执行
+            try:
+                command_outputs = self._run_commands_batched(connection, commands)
+            except Exception as e:
+                logger.warning(f"设备 {device.get('host')} 批量执行命令失败（{str(e)}），回退为逐条执行...")
+                command_outputs = self._run_commands_serial(connection, commands, prompt=prompt)
+
+            # 用列表收集分块后一次join，避免字符串+=反复拷贝已累积的内容
+            output_parts = []
+            for cmd, cmd_output in zip(commands, command_outputs):
+                output_parts.append(f'\n--- Command: {cmd} ---\n')
+                output_parts.append(cmd_output or '')
+            output = ''.join(output_parts)
+
+            result.status = 'success'
+            result.output = output
             
         except Exception as e:
-            result['output'] = f'执行命令时发生错误: {str(e)}'
-            result['password_used'] = password_used
+            result.output = f'执行命令时发生错误: {str(e)}'
+            result.password_used = password_used
         finally:
             # 关闭连接
             try:
@@ -266,7 +449,104 @@ class NetworkInspector:
                 pass
                 
         return result
-    
+
+    def _run_commands_batched(self, connection, commands):
+        """
+        一次性批量下发所有巡检命令，按哨兵标记切分输出
+
+        逐条send_command_timing每条命令都要等待一次提示符检测，
+        批量写入只需等待一次。设备会逐行回显收到的输入，
+        因此在命令之间插入唯一的哨兵行，读完整个输出后按哨兵回显切分，
+        即可还原每条命令各自的输出。
+
+        Args:
+            connection: 已建立的Netmiko连接
+            commands (list): 命令列表
+
+        Returns:
+            list: 与commands一一对应的输出列表
+        """
+        if not commands:
+            return []
+
+        markers = [f'===CMD_END:{i}===' for i in range(len(commands))]
+
+        # 命令与哨兵行交替排列，一次写入整个批次
+        batch_lines = []
+        for cmd, marker in zip(commands, markers):
+            batch_lines.append(cmd)
+            batch_lines.append(marker)
+        connection.write_channel('\n'.join(batch_lines) + '\n')
+
+        # 设备按顺序处理输入，最后一个哨兵的回显出现即代表整个批次执行完毕
+        # 超时时间覆盖整个批次，而不是每条命令单独等待
+        raw_output = connection.read_until_pattern(
+            pattern=re.escape(markers[-1]),
+            read_timeout=max(30, 15 * len(commands))
+        )
+
+        # 按哨兵回显切分，还原每条命令的输出
+        outputs = []
+        pos = 0
+        for cmd, marker in zip(commands, markers):
+            end = raw_output.find(marker, pos)
+            segment = raw_output[pos:end] if end != -1 else raw_output[pos:]
+
+            # 去掉命令回显及其之前的内容（包括上一个哨兵行引起的错误提示）
+            cmd_echo = segment.find(cmd)
+            if cmd_echo != -1:
+                segment = segment[cmd_echo + len(cmd):]
+
+            outputs.append(segment.strip('\r\n'))
+            pos = (end + len(marker)) if end != -1 else len(raw_output)
+
+        return outputs
+
+    def _run_commands_serial(self, connection, commands, prompt=None):
+        """
+        逐条执行巡检命令（批量执行失败时的回退路径）
+
+        已知设备提示符时用send_command以提示符正则作为结束条件，
+        输出一出现提示符就立即返回；timing模式靠字符间静默判断结束，
+        输出很短的命令也要白等数秒。未提供提示符时退回timing模式。
+
+        Args:
+            connection: 已建立的Netmiko连接
+            commands (list): 命令列表
+            prompt (str): 设备提示符，用于构造结束条件正则（可选）
+
+        Returns:
+            list: 与commands一一对应的输出列表
+        """
+        expect_string = re.escape(prompt.strip()) if prompt else None
+        outputs = []
+
+        for cmd in commands:
+            try:
+                if expect_string:
+                    # 看到提示符立即返回，30秒只是兜底超时
+                    cmd_output = connection.send_command(
+                        cmd,
+                        expect_string=expect_string,
+                        read_timeout=30,
+                        strip_prompt=False,    # 保留提示符
+                        strip_command=True     # 移除命令本身
+                    )
+                else:
+                    # 使用send_command_timing作为更可靠的方法
+                    cmd_output = connection.send_command_timing(
+                        cmd,
+                        read_timeout=30,       # 设置30秒超时
+                        strip_prompt=False,    # 保留提示符
+                        strip_command=True     # 移除命令本身
+                    )
+                outputs.append(cmd_output or '')
+            except Exception as e:
+                # 记录错误但继续执行下一个命令
+                outputs.append(f"命令 '{cmd}' 执行失败: {str(e)}\n")
+
+        return outputs
+
     def _get_inspection_commands(self, device):
         """
         从设备配置中获取巡检命令，如果没有配置则使用默认命令
@@ -287,80 +567,49 @@ class NetworkInspector:
             return self.commands[device_type]
         
         # 否则根据设备类型使用默认命令
-        commands_map = {
-            'cisco_ios': [
-                'show version',
-                'show ip interface brief',
-                'show vlan brief',
-                'show spanning-tree summary',
-                'show arp',
-                'show processes cpu',
-                'show memory statistics'
-            ],
-            'cisco_xe': [
-                'show version',
-                'show ip interface brief',
-                'show vlan brief',
-                'show spanning-tree summary',
-                'show arp',
-                'show processes cpu',
-                'show memory statistics'
-            ],
-            'cisco_nxos': [
-                'show version',
-                'show interface brief',
-                'show vlan brief',
-                'show spanning-tree detail',
-                'show ip arp',
-                'show processes cpu',
-                'show processes memory'
-            ],
-            'huawei': [
-                'display version',
-                'display ip interface brief',
-                'display vlan',
-                'display stp brief',
-                'display arp',
-                'display cpu-usage',
-                'display memory-usage'
-            ],
-            'h3c': [
-                'display version',
-                'display ip interface brief',
-                'display vlan',
-                'display stp brief',
-                'display arp',
-                'display cpu-usage',
-                'display memory'
-            ],
-            'juniper': [
-                'show version',
-                'show interfaces terse',
-                'show vlans',
-                'show spanning-tree bridge',
-                'show arp',
-                'show chassis alarms',
-                'show system processes summary'
-            ]
-        }
-        
-        return commands_map.get(device_type, ['show version'])
+        return list(_default_commands(device_type))
     
-    def run_inspection(self):
+    def run_inspection(self, max_workers=None):
         """
-        对所有设备执行巡检
-        
+        对所有设备并发执行巡检
+
+        巡检是典型的I/O密集型任务（Netmiko在等待SSH数据时会释放GIL），
+        使用线程池并发连接可以把总耗时从所有设备耗时之和降低到最慢设备的耗时。
+
+        Args:
+            max_workers (int): 最大并发线程数，默认根据设备数量自动确定（不超过32）
+
         Returns:
             list: 所有设备的巡检结果
         """
         results = []
-        
-        for device in self.devices:
-            print(f"正在巡检设备: {device.get('host')}...")
-            result = self.inspect_device(device)
-            results.append(result)
-            print(f"设备 {result['hostname']} 巡检完成，状态: {result['status']}")
-            
+
+        if not self.devices:
+            return results
+
+        if max_workers is None:
+            max_workers = min(32, len(self.devices))
+        max_workers = max(1, min(max_workers, len(self.devices)))
+
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = {executor.submit(self.inspect_device, device): device
+                       for device in self.devices}
+
+            for future in as_completed(futures):
+                device = futures[future]
+                try:
+                    result = future.result()
+                except Exception as e:
+                    # inspect_device内部已经捕获了常见异常，这里兜底防止单台设备中断整体巡检
+                    result = InspectResult(
+                        hostname=device.get('host'),
+                        ip_address=device.get('host'),
+                        device_type=device.get('device_type'),
+                        output=f'发生错误: {str(e)}'
+                    )
+                results.append(result)
+                logger.info(f"设备 {result.hostname} 巡检完成，状态: {result.status}")
+
         return results
     
     def save_results(self, results, output_file='inspection_results.txt'):
@@ -376,26 +625,33 @@ class NetworkInspector:
         # 获取当前时间作为时间戳
         timestamp = datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')
         
-        with open(output_file, 'w', encoding='utf-8') as f:
+        # 先写临时文件再原子替换，写入中途崩溃不会截断上一份报告
+        tmp_file = output_file + '.tmp'
+
+        # 1MiB写缓冲区：把每台设备的多次write合并为少量大块write系统调用
+        with open(tmp_file, 'w', encoding='utf-8', buffering=1 << 20) as f:
             # 写入时间戳
             f.write(f"巡检时间: {timestamp}\n")
             f.write("=" * 50 + "\n\n")
             
             for result in results:
-                f.write(f"设备: {result['hostname']} ({result['device_type']})\n")
+                # 每台设备的内容先收集到列表，一次join后写入
+                block = [f"设备: {result.hostname} ({result.device_type})\n"]
                 # 输出IP地址
-                if result.get('ip_address'):
-                    f.write(f"IP地址: {result['ip_address']}\n")
-                f.write(f"状态: {result['status']}\n")
+                if result.ip_address:
+                    block.append(f"IP地址: {result.ip_address}\n")
+                block.append(f"状态: {result.status}\n")
                 # 输出使用的密码信息
-                if result['password_used']:
-                    f.write(f"登录密码: {result['password_used']}\n")
-                elif result['status'] != 'success':
-                    f.write(f"登录密码: 未成功登录\n")
-                f.write(f"输出:\n{result['output']}\n")
-                f.write("=" * 50 + "\n\n")
-        
-        print(f"巡检结果已保存到 {output_file}")
+                if result.password_used:
+                    block.append(f"登录密码: {result.password_used}\n")
+                elif result.status != 'success':
+                    block.append(f"登录密码: 未成功登录\n")
+                block.append(f"输出:\n{result.output}\n")
+                block.append("=" * 50 + "\n\n")
+                f.write(''.join(block))
+
+        os.replace(tmp_file, output_file)
+        logger.info(f"巡检结果已保存到 {output_file}")
 
 
 def main():
@@ -412,41 +668,50 @@ def main():
                         help='混合配置文件路径（同时包含设备和命令信息）')
     parser.add_argument('--conf', 
                         help='conf格式的设备配置文件路径')
-    parser.add_argument('-o', '--output', 
+    parser.add_argument('-o', '--output',
                         help='巡检报告输出文件路径')
+    parser.add_argument('-w', '--workers', type=int,
+                        help='并发巡检的最大线程数（默认根据设备数量自动确定）')
     
     # 解析命令行参数
     args = parser.parse_args()
-    
-    # 处理混合配置文件选项
-    if args.mixed:
-        # 如果指定了混合配置文件，则使用它作为设备文件，不使用单独的命令文件
-        inspector = NetworkInspector(devices_file=args.mixed)
-    elif args.conf:
-        # 如果指定了conf配置文件，则使用它
-        inspector = NetworkInspector(config_file=args.conf)
-    elif args.devices:
-        # 如果指定了设备配置文件，则使用它
-        inspector = NetworkInspector(devices_file=args.devices, commands_file=args.commands)
-    elif args.config:
-        # 如果直接指定了配置文件，则尝试作为混合配置文件处理
-        inspector = NetworkInspector(devices_file=args.config)
-    else:
-        # 使用默认设备配置文件
-        inspector = NetworkInspector()
-    
-    if not inspector.devices:
-        print("没有找到有效的设备配置，请检查设备配置文件。")
-        return
-    
-    # 执行巡检
-    results = inspector.run_inspection()
-    
-    # 保存结果（只保存TXT文本，不生成HTML报告）
-    if args.output:
-        inspector.save_results(results, args.output)
-    else:
-        inspector.save_results(results)
+
+    # 启动队列化日志输出
+    listener = _setup_logging()
+
+    try:
+        # 处理混合配置文件选项
+        if args.mixed:
+            # 如果指定了混合配置文件，则使用它作为设备文件，不使用单独的命令文件
+            inspector = NetworkInspector(devices_file=args.mixed)
+        elif args.conf:
+            # 如果指定了conf配置文件，则使用它
+            inspector = NetworkInspector(config_file=args.conf)
+        elif args.devices:
+            # 如果指定了设备配置文件，则使用它
+            inspector = NetworkInspector(devices_file=args.devices, commands_file=args.commands)
+        elif args.config:
+            # 如果直接指定了配置文件，则尝试作为混合配置文件处理
+            inspector = NetworkInspector(devices_file=args.config)
+        else:
+            # 使用默认设备配置文件
+            inspector = NetworkInspector()
+
+        if not inspector.devices:
+            logger.warning("没有找到有效的设备配置，请检查设备配置文件。")
+            return
+
+        # 执行巡检
+        results = inspector.run_inspection(max_workers=args.workers)
+
+        # 保存结果（只保存TXT文本，不生成HTML报告）
+        if args.output:
+            inspector.save_results(results, args.output)
+        else:
+            inspector.save_results(results)
+    finally:
+        # 停止监听器，确保队列中剩余的日志全部输出
+        listener.stop()
 
 
 if __name__ == '__main__':